@@ -2,11 +2,14 @@ import dash
 from dash import dcc, html, dash_table
 import plotly.express as px
 import pandas as pd
+import numpy as np
+import os
 from datetime import datetime
+from functools import lru_cache
 
-# Load and process data
-df = pd.read_csv('dataset/Vending_Machine_Sales_Data_Singapore.csv')
-df['Date'] = pd.to_datetime(df['Date'])
+# Raw dataset and the Parquet files caching the preprocessed df and final_order_df
+DATA_PATH = 'dataset/Vending_Machine_Sales_Data_Singapore.csv'
+CACHE_PATHS = ('dataset/df.parquet', 'dataset/preprocessed.parquet')
 
 #color palette
 colors = {
@@ -23,46 +26,130 @@ colors = {
 # Define a custom colorscale for charts
 category_colors = px.colors.qualitative.Bold
 
-# Calculate total sales and other metrics (same as original)
-total_sales = df.groupby(['Machine_ID', 'Location_Type', 'Product_ID', 'Product_Name'])['Units_Sold'].sum().reset_index()
-total_sales.rename(columns={'Units_Sold': 'Total_Units_Sold'}, inplace=True)
-
-# Count unique active days
-active_days = df.groupby(['Machine_ID', 'Location_Type', 'Product_ID'])['Date'].nunique().reset_index()
-active_days.rename(columns={'Date': 'Active_Days'}, inplace=True)
-
-# Merge total sales and active days
-sales_data = total_sales.merge(active_days, on=['Machine_ID', 'Location_Type', 'Product_ID'])
-
-# Calculate average daily sales
-sales_data['Avg_Daily_Sales'] = (sales_data['Total_Units_Sold'] / sales_data['Active_Days']).round(2)
-
-# Merge lead time
-lead_time = df.groupby(['Machine_ID', 'Location_Type', 'Product_ID'])['Lead_Time_Days'].mean().reset_index()
-sales_data = sales_data.merge(lead_time, on=['Machine_ID', 'Location_Type', 'Product_ID'])
+# Calculate average daily sales, restock frequency, safety stock and recommended stock level
+# on the raw arrays, reusing buffers instead of allocating a new column per step
+def compute_stock_levels(total_units, active_days, lead_time):
+    avg_daily_sales = np.round(total_units / active_days, 2)
+
+    restock_frequency = np.divide(12, avg_daily_sales)
+    np.round(restock_frequency, out=restock_frequency)
+    np.clip(restock_frequency, 2, 10, out=restock_frequency)
+
+    safety_stock = np.multiply(avg_daily_sales, 0.2)
+    np.round(safety_stock, out=safety_stock)
+
+    recommended_stock = np.add(restock_frequency, lead_time)
+    recommended_stock *= avg_daily_sales
+    recommended_stock += safety_stock
+    np.round(recommended_stock, out=recommended_stock)
+
+    return avg_daily_sales, restock_frequency, safety_stock, recommended_stock.astype(np.int32)
+
+# Load the CSV and compute the stock level and order quantity frames
+def load_data():
+    # Load the raw data (only the columns the dashboard uses)
+    df = pd.read_csv(
+        DATA_PATH,
+        usecols=['Machine_ID', 'Location_Type', 'Date', 'Product_ID', 'Product_Name', 'Category',
+                 'Units_Sold', 'Current_Stock_Level', 'Lead_Time_Days'],
+        parse_dates=['Date'],
+        date_format='%Y-%m-%d',
+        dtype={'Machine_ID': 'category', 'Location_Type': 'category', 'Product_ID': 'category',
+               'Product_Name': 'category', 'Category': 'category',
+               'Units_Sold': 'int32', 'Current_Stock_Level': 'int32', 'Lead_Time_Days': 'float32'}
+    )
 
-# Calculate restock frequency and safety stock
-sales_data['Restock_Frequency_Days'] = (12 / sales_data['Avg_Daily_Sales']).round().clip(lower=2, upper=10)
-sales_data['Safety_Stock'] = (sales_data['Avg_Daily_Sales'] * 0.2).round()
+    # Calculate total sales, unique active days and lead time in one pass
+    sales_data = df.groupby(['Machine_ID', 'Location_Type', 'Product_ID', 'Product_Name'], observed=True).agg(
+        Total_Units_Sold=('Units_Sold', 'sum'),
+        Active_Days=('Date', 'nunique'),
+        Lead_Time_Days=('Lead_Time_Days', 'mean')
+    ).reset_index()
+
+    # Derive the stock level columns from the aggregated sales
+    (
+        sales_data['Avg_Daily_Sales'],
+        sales_data['Restock_Frequency_Days'],
+        sales_data['Safety_Stock'],
+        sales_data['Recommended_Stock_Level']
+    ) = compute_stock_levels(
+        sales_data['Total_Units_Sold'].to_numpy(),
+        sales_data['Active_Days'].to_numpy(),
+        sales_data['Lead_Time_Days'].to_numpy()
+    )
 
-# Calculate recommended stock level
-sales_data['Recommended_Stock_Level'] = (
-    sales_data['Avg_Daily_Sales'] * (sales_data['Restock_Frequency_Days'] + sales_data['Lead_Time_Days']) + 
-    sales_data['Safety_Stock']
-).round()
+    # Add category information
+    category_map = df.drop_duplicates('Product_ID').set_index('Product_ID')['Category']
+    sales_data['Category'] = sales_data['Product_ID'].map(category_map)
+
+    # Get latest stock levels (the last row in file order when a date has several records)
+    latest_idx = df.iloc[::-1].groupby(['Machine_ID', 'Product_ID'], observed=True, sort=False)['Date'].idxmax()
+    latest_stock = df.loc[latest_idx, ['Machine_ID', 'Product_ID', 'Current_Stock_Level']].reset_index(drop=True)
+
+    # Merge with sales data (only the columns kept for the table) and calculate order quantity
+    sales_slim = sales_data[['Machine_ID', 'Location_Type', 'Product_ID', 'Product_Name', 'Category', 'Recommended_Stock_Level']]
+    final_order_df = sales_slim.merge(latest_stock, on=['Machine_ID', 'Product_ID'], how='left')
+    final_order_df['Order_Quantity'] = (final_order_df['Recommended_Stock_Level'] - final_order_df['Current_Stock_Level']).clip(lower=0)
+    final_order_df = final_order_df[['Machine_ID', 'Location_Type', 'Product_Name', 'Category', 'Current_Stock_Level', 'Recommended_Stock_Level', 'Order_Quantity']]
+
+    return df, final_order_df
+
+# Reuse the preprocessed frames from the Parquet cache unless the CSV or this
+# file (which holds the preprocessing code) is newer
+def cache_is_fresh():
+    source_mtime = max(os.path.getmtime(DATA_PATH), os.path.getmtime(__file__))
+    return all(
+        os.path.exists(path) and os.path.getmtime(path) > source_mtime
+        for path in CACHE_PATHS
+    )
 
-# Add category information
-category_lookup = df[['Product_ID', 'Category']].drop_duplicates()
-sales_data = sales_data.merge(category_lookup, on='Product_ID', how='left')
+if cache_is_fresh():
+    df, final_order_df = (pd.read_parquet(path) for path in CACHE_PATHS)
+else:
+    df, final_order_df = load_data()
+    try:
+        # Write to a temporary file first so an interrupted write never leaves a
+        # truncated cache file that looks fresh
+        for frame, path in zip((df, final_order_df), CACHE_PATHS):
+            frame.to_parquet(path + '.tmp')
+            os.replace(path + '.tmp', path)
+    except (ImportError, OSError):
+        # No Parquet engine installed or dataset/ is not writable, keep running from the CSV
+        pass
+
+# Precompute per-machine data once so the selected machine callback is a dict lookup
+orders_by_location = dict(tuple(final_order_df.groupby('Location_Type', observed=True, sort=False)))
+
+MACHINE_CACHE = {}
+for location, location_df in df.groupby('Location_Type', observed=True, sort=False):
+    machine_units = location_df.groupby('Date')['Units_Sold'].sum().reset_index()
+
+    # The order table already holds the current and recommended stock side by side
+    stock_data = orders_by_location[location]
+
+    # Prepare data for grouped bar chart
+    bar_df = stock_data.melt(
+        id_vars='Product_Name',
+        value_vars=['Current_Stock_Level', 'Recommended_Stock_Level'],
+        var_name='Type',
+        value_name='Value'
+    )
+    bar_df['Type'] = pd.Categorical.from_codes(
+        np.repeat([0, 1], len(stock_data)),
+        categories=['Current Stock', 'Recommended Stock']
+    )
 
-# Get latest stock levels
-latest_stock = df.sort_values('Date').groupby(['Machine_ID', 'Product_ID'])['Current_Stock_Level'].last().reset_index()
-latest_stock['Current_Stock_Level'] = latest_stock['Current_Stock_Level'].round().astype(int)
+    MACHINE_CACHE[location] = {
+        'units': machine_units,
+        'bar': bar_df,
+        'table': stock_data.to_dict('records')
+    }
 
-# Merge with sales data and calculate order quantity
-final_order_df = sales_data.merge(latest_stock, on=['Machine_ID', 'Product_ID'], how='left')
-final_order_df['Order_Quantity'] = (final_order_df['Recommended_Stock_Level'] - final_order_df['Current_Stock_Level']).clip(lower=0).round().astype(int)
-final_order_df = final_order_df[['Machine_ID', 'Location_Type', 'Product_Name', 'Category', 'Current_Stock_Level', 'Recommended_Stock_Level', 'Order_Quantity']]
+# Precompute the overall aggregates, they do not depend on the selected machine
+OVERALL_UNITS = df.groupby('Date')['Units_Sold'].sum().reset_index()
+MACHINE_UNITS = df.groupby(['Date', 'Machine_ID'], observed=True)['Units_Sold'].sum().reset_index()
+PRODUCT_SALES = df.groupby('Product_Name', observed=True)['Units_Sold'].sum().reset_index()
+TOTAL_UNITS_STR = f"{PRODUCT_SALES['Units_Sold'].sum():,}"
 
 # Custom CSS for better styling
 external_stylesheets = [
@@ -79,6 +166,9 @@ external_stylesheets = [
 # Initialize Dash app with external stylesheets
 app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
 
+# Flask server for running under a WSGI server such as gunicorn
+server = app.server
+
 # Custom styles
 card_style = {
     'backgroundColor': colors['light_bg'],
@@ -133,7 +223,7 @@ app.layout = html.Div([
         ], style={'color': colors['primary'], 'fontWeight': 'bold', 'marginBottom': '10px', 'fontSize': '16px'}),
         dcc.Dropdown(
             id='machine-dropdown',
-            options=[{'label': 'ALL MACHINES', 'value': 'ALL'}] + [{'label': machine, 'value': machine} for machine in df['Location_Type'].unique()],
+            options=[{'label': 'ALL MACHINES', 'value': 'ALL'}] + [{'label': machine, 'value': machine} for machine in MACHINE_CACHE],
             value='ALL',
             style=dropdown_style
         )
@@ -241,7 +331,112 @@ def toggle_sections(selected_machine):
     else:
         return {**card_style, 'display': 'none'}, {**card_style, 'display': 'block'}
 
-# Callback for overall graphs (updates when "ALL MACHINES" is selected)
+# Build the overall figures once, they do not depend on the selected machine
+
+# Total units sold over time
+FIG_LINE = px.line(OVERALL_UNITS, x='Date', y='Units_Sold', title='Total Units Sold Over Time')
+FIG_LINE.update_traces(
+    line=dict(color=colors['primary'], width=3),
+    mode='lines+markers',
+    marker=dict(size=6, color=colors['primary'])
+)
+FIG_LINE.update_layout(
+    paper_bgcolor='white',
+    plot_bgcolor='white',
+    title_font=dict(family="Roboto, sans-serif", color=colors['primary'], size=18),
+    margin=dict(l=40, r=40, t=50, b=40),
+    hovermode='x unified',
+    xaxis=dict(
+        showgrid=True,
+        gridcolor='#EEEEEE',
+        title_font=dict(family="Roboto, sans-serif", color=colors['text']),
+        tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
+    ),
+    yaxis=dict(
+        showgrid=True,
+        gridcolor='#EEEEEE',
+        title_font=dict(family="Roboto, sans-serif", color=colors['text']),
+        tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
+    )
+)
+
+# Units sold by machine over time
+FIG_AREA = px.area(
+    MACHINE_UNITS, 
+    x='Date', 
+    y='Units_Sold', 
+    color='Machine_ID', 
+    title='Units Sold by Machine Over Time',
+    color_discrete_sequence=category_colors
+)
+FIG_AREA.update_layout(
+    paper_bgcolor='white',
+    plot_bgcolor='white',
+    title_font=dict(family="Roboto, sans-serif", color=colors['primary'], size=18),
+    margin=dict(l=40, r=40, t=50, b=40),
+    hovermode='x unified',
+    legend=dict(
+        title_font=dict(family="Roboto, sans-serif", color=colors['text']),
+        font=dict(family="Roboto, sans-serif", color=colors['text'])
+    ),
+    xaxis=dict(
+        showgrid=True,
+        gridcolor='#EEEEEE',
+        title_font=dict(family="Roboto, sans-serif", color=colors['text']),
+        tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
+    ),
+    yaxis=dict(
+        showgrid=True,
+        gridcolor='#EEEEEE',
+        title_font=dict(family="Roboto, sans-serif", color=colors['text']),
+        tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
+    )
+)
+
+# Sales distribution by category, pulling out the largest segment
+pie_pull = np.zeros(len(PRODUCT_SALES))
+pie_pull[PRODUCT_SALES['Units_Sold'].to_numpy().argmax()] = 0.05
+
+FIG_PIE = px.pie(
+    PRODUCT_SALES, 
+    values='Units_Sold', 
+    names='Product_Name', 
+    title='Sales Distribution by Product',
+    color_discrete_sequence=category_colors,
+    hole=0.4  
+)
+FIG_PIE.update_traces(
+    textposition='inside',
+    textinfo='percent+label',
+    marker=dict(line=dict(color='white', width=2)),
+    pull=pie_pull
+)
+FIG_PIE.update_layout(
+    paper_bgcolor='white',
+    plot_bgcolor='white',
+    title_font=dict(family="Roboto, sans-serif", color=colors['primary'], size=18),
+    margin=dict(l=20, r=20, t=50, b=20),
+    legend=dict(
+        orientation='h',
+        yanchor='bottom',
+        y=-0.2,
+        xanchor='center',
+        x=0.5,
+        font=dict(family="Roboto, sans-serif", color=colors['text'])
+    ),
+    annotations=[dict(
+        text='Total Units:<br>' + TOTAL_UNITS_STR,
+        showarrow=False,
+        font=dict(size=14, family="Roboto, sans-serif", color=colors['primary']),
+        x=0.5,
+        y=0.5
+    )]
+)
+
+# Serialize the overall figures once so the callback does not re-validate them
+OVERALL_FIGURES = (FIG_LINE.to_dict(), FIG_AREA.to_dict(), FIG_PIE.to_dict())
+
+# Callback for overall graphs (the figures do not depend on the selection)
 @app.callback(
     [dash.dependencies.Output('overall-units-sold-line', 'figure'),
      dash.dependencies.Output('overall-units-sold-area', 'figure'),
@@ -249,9 +444,22 @@ def toggle_sections(selected_machine):
     [dash.dependencies.Input('machine-dropdown', 'value')]
 )
 def update_overall_graphs(selected_machine):
-    # Total units sold over time
-    overall_units = df.groupby('Date')['Units_Sold'].sum().reset_index()
-    fig_line = px.line(overall_units, x='Date', y='Units_Sold', title='Total Units Sold Over Time')
+    return OVERALL_FIGURES
+
+# Build the figures for one machine and serialize them for the callback,
+# memoized so each machine's figures are built on its first selection only
+@lru_cache(maxsize=None)
+def build_machine_figures(location):
+    machine_cache = MACHINE_CACHE[location]
+    machine_units = machine_cache['units']
+    
+    # Create the line chart with enhanced styling
+    fig_line = px.line(
+        machine_units, 
+        x='Date', 
+        y='Units_Sold', 
+        title=f'Units Sold Over Time - {location}'
+    )
     fig_line.update_traces(
         line=dict(color=colors['primary'], width=3),
         mode='lines+markers',
@@ -274,82 +482,57 @@ def update_overall_graphs(selected_machine):
             gridcolor='#EEEEEE',
             title_font=dict(family="Roboto, sans-serif", color=colors['text']),
             tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
-        )
+        ),
+        height=400
     )
 
-    # Units sold by machine over time
-    machine_units = df.groupby(['Date', 'Machine_ID'])['Units_Sold'].sum().reset_index()
-    fig_area = px.area(
-        machine_units, 
-        x='Date', 
-        y='Units_Sold', 
-        color='Machine_ID', 
-        title='Units Sold by Machine Over Time',
-        color_discrete_sequence=category_colors
+    # Create the bar chart with enhanced styling
+    bar_df = machine_cache['bar']
+    
+    # Create grouped bar chart
+    fig_bar = px.bar(
+        bar_df, 
+        x='Product_Name', 
+        y='Value', 
+        color='Type', 
+        barmode='group',
+        title=f'Stock Levels - {location}',
+        color_discrete_map={
+            'Current Stock': colors['accent'],
+            'Recommended Stock': colors['secondary']
+        }
     )
-    fig_area.update_layout(
+    fig_bar.update_layout(
         paper_bgcolor='white',
         plot_bgcolor='white',
         title_font=dict(family="Roboto, sans-serif", color=colors['primary'], size=18),
-        margin=dict(l=40, r=40, t=50, b=40),
-        hovermode='x unified',
+        margin=dict(l=40, r=40, t=50, b=100),
         legend=dict(
-            title_font=dict(family="Roboto, sans-serif", color=colors['text']),
-            font=dict(family="Roboto, sans-serif", color=colors['text'])
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='right',
+            x=1
         ),
         xaxis=dict(
-            showgrid=True,
-            gridcolor='#EEEEEE',
+            title='Product',
+            tickangle=45,
             title_font=dict(family="Roboto, sans-serif", color=colors['text']),
             tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
         ),
         yaxis=dict(
-            showgrid=True,
-            gridcolor='#EEEEEE',
+            title='Units',
             title_font=dict(family="Roboto, sans-serif", color=colors['text']),
             tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
-        )
-    )
-
-    # Sales distribution by category
-    product_sales = df.groupby('Product_Name')['Units_Sold'].sum().reset_index()
-    fig_pie = px.pie(
-        product_sales, 
-        values='Units_Sold', 
-        names='Product_Name', 
-        title='Sales Distribution by Product',
-        color_discrete_sequence=category_colors,
-        hole=0.4  
-    )
-    fig_pie.update_traces(
-        textposition='inside',
-        textinfo='percent+label',
-        marker=dict(line=dict(color='white', width=2)),
-        pull=[0.05 if i == product_sales['Units_Sold'].idxmax() else 0 for i in range(len(product_sales))]  # Pull out the largest segment
-    )
-    fig_pie.update_layout(
-        paper_bgcolor='white',
-        plot_bgcolor='white',
-        title_font=dict(family="Roboto, sans-serif", color=colors['primary'], size=18),
-        margin=dict(l=20, r=20, t=50, b=20),
-        legend=dict(
-            orientation='h',
-            yanchor='bottom',
-            y=-0.2,
-            xanchor='center',
-            x=0.5,
-            font=dict(family="Roboto, sans-serif", color=colors['text'])
         ),
-        annotations=[dict(
-            text='Total Units:<br>' + f"{product_sales['Units_Sold'].sum():,}",
-            showarrow=False,
-            font=dict(size=14, family="Roboto, sans-serif", color=colors['primary']),
-            x=0.5,
-            y=0.5
-        )]
+        height=450
     )
 
-    return fig_line, fig_area, fig_pie
+    return {
+        'line': fig_line.to_dict(),
+        'bar': fig_bar.to_dict(),
+        'table': machine_cache['table']
+    }
 
 # Callback for selected machine graphs (updates when a specific machine is selected)
 @app.callback(
@@ -371,114 +554,9 @@ def update_selected_machine_graphs(selected_machine):
         }
         return empty_fig, empty_fig, []
     else:
-        # Filter data for the selected machine
-        machine_df = df[df['Location_Type'] == selected_machine]
-        machine_units = machine_df.groupby('Date')['Units_Sold'].sum().reset_index()
-        
-        # Create the line chart with enhanced styling
-        fig_line = px.line(
-            machine_units, 
-            x='Date', 
-            y='Units_Sold', 
-            title=f'Units Sold Over Time - {selected_machine}'
-        )
-        fig_line.update_traces(
-            line=dict(color=colors['primary'], width=3),
-            mode='lines+markers',
-            marker=dict(size=6, color=colors['primary'])
-        )
-        fig_line.update_layout(
-            paper_bgcolor='white',
-            plot_bgcolor='white',
-            title_font=dict(family="Roboto, sans-serif", color=colors['primary'], size=18),
-            margin=dict(l=40, r=40, t=50, b=40),
-            hovermode='x unified',
-            xaxis=dict(
-                showgrid=True,
-                gridcolor='#EEEEEE',
-                title_font=dict(family="Roboto, sans-serif", color=colors['text']),
-                tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='#EEEEEE',
-                title_font=dict(family="Roboto, sans-serif", color=colors['text']),
-                tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
-            ),
-            height=400
-        )
-
-        # Create the bar chart with enhanced styling
-        machine_sales_data = sales_data[sales_data['Location_Type'] == selected_machine]
-        
-        # Add the current stock level to the display
-        stock_data = final_order_df[final_order_df['Location_Type'] == selected_machine]
-        merged_data = machine_sales_data.merge(
-            stock_data[['Product_Name', 'Current_Stock_Level']], 
-            on='Product_Name', 
-            how='left'
-        )
-        
-        # Prepare data for grouped bar chart
-        bar_data = []
-        for _, row in merged_data.iterrows():
-            bar_data.append({
-                'Product_Name': row['Product_Name'],
-                'Value': row['Current_Stock_Level'],
-                'Type': 'Current Stock'
-            })
-            bar_data.append({
-                'Product_Name': row['Product_Name'],
-                'Value': row['Recommended_Stock_Level'],
-                'Type': 'Recommended Stock'
-            })
-            
-        bar_df = pd.DataFrame(bar_data)
-        
-        # Create grouped bar chart
-        fig_bar = px.bar(
-            bar_df, 
-            x='Product_Name', 
-            y='Value', 
-            color='Type', 
-            barmode='group',
-            title=f'Stock Levels - {selected_machine}',
-            color_discrete_map={
-                'Current Stock': colors['accent'],
-                'Recommended Stock': colors['secondary']
-            }
-        )
-        fig_bar.update_layout(
-            paper_bgcolor='white',
-            plot_bgcolor='white',
-            title_font=dict(family="Roboto, sans-serif", color=colors['primary'], size=18),
-            margin=dict(l=40, r=40, t=50, b=100),
-            legend=dict(
-                orientation='h',
-                yanchor='bottom',
-                y=1.02,
-                xanchor='right',
-                x=1
-            ),
-            xaxis=dict(
-                title='Product',
-                tickangle=45,
-                title_font=dict(family="Roboto, sans-serif", color=colors['text']),
-                tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
-            ),
-            yaxis=dict(
-                title='Units',
-                title_font=dict(family="Roboto, sans-serif", color=colors['text']),
-                tickfont=dict(family="Roboto, sans-serif", color=colors['text'])
-            ),
-            height=450
-        )
-
-        # Get table data
-        machine_order_df = final_order_df[final_order_df['Location_Type'] == selected_machine]
-        table_data = machine_order_df.to_dict('records')
-
-        return fig_line, fig_bar, table_data
+        # Serve the prebuilt figures and table for the selected machine
+        machine_figures = build_machine_figures(selected_machine)
+        return machine_figures['line'], machine_figures['bar'], machine_figures['table']
 
 # Run the app
 if __name__ == '__main__':
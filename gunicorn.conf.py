@@ -0,0 +1,8 @@
+# Gunicorn settings for serving the dashboard: gunicorn -c gunicorn.conf.py dashboard:server
+bind = '0.0.0.0:8050'
+workers = 4
+worker_class = 'gthread'
+threads = 4
+
+# Load the app (and preprocess the data) once in the master so workers share it
+preload_app = True